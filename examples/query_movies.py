@@ -4,7 +4,7 @@ Example script demonstrating how to use the semantic layer over a graph database
 import os
 from dotenv import load_dotenv
 
-from graphsemantics.database import GraphDatabase
+from graphsemantics.database import get_default_graph_database
 from graphsemantics.agent import SemanticAgent
 
 def setup_environment():
@@ -28,7 +28,7 @@ def main():
 
     # Initialize database and import sample data
     print("Initializing database connection...")
-    db = GraphDatabase()
+    db = get_default_graph_database()
 
     print("Importing sample movie data...")
     db.import_movie_data()
@@ -1,56 +1,254 @@
 """
 Agent implementation for semantic layer over graph database.
 """
+import asyncio
+import json
 import os
-from typing import List, Tuple
+import queue
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from langchain.agents import AgentExecutor
 from langchain.agents.format_scratchpad import format_to_openai_function_messages
 from langchain.agents.output_parsers import OpenAIFunctionsAgentOutputParser
+from langchain.globals import set_llm_cache
+from langchain_community.cache import InMemoryCache, SQLiteCache
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
 from langchain_core.utils.function_calling import convert_to_openai_function
 from langchain_openai import ChatOpenAI
+from openai import OpenAI
+
+from graphsemantics.tools import BatchInformationTool, InformationTool
+
+SYSTEM_PROMPT = (
+    "Answer movie questions and recommend movies. Use the tools for facts. "
+    "Ask for clarification, listing the options, only when needed. "
+    "Do only what is asked."
+)
+
+# Batch API requests cannot call tools; facts are inlined as context instead
+BATCH_SYSTEM_PROMPT = (
+    "Answer movie questions and recommend movies using the given context. "
+    "Do only what is asked."
+)
+
+# A capitalized title or name such as "The Lord of the Rings", optionally quoted
+_ENTITY_PATTERN = (
+    r"[\"']?(?P<entity>%(word)s(?: (?:%(word)s|of|the|a|an|and|in|on|to|for))*)[\"']?"
+    % {"word": r"[A-Z0-9](?:[\w'.:-]*\w)?[.:]??"}
+)
+
+# Simple lookups that can be answered straight from the database without the LLM,
+# with the kind of entity and the relationship they ask about
+_SHORTCUT_PATTERNS = [
+    (re.compile(pattern % _ENTITY_PATTERN), kind, role)
+    for pattern, kind, role in (
+        (r"^(?i:who (?:played|acted|starred) in) %s[?.!]?$", "movie", "ACTED_IN"),
+        (r"^(?i:who directed) %s[?.!]?$", "movie", "DIRECTED"),
+        (r"^(?i:what movies did) %s (?i:direct)[?.!]?$", "person", "DIRECTED"),
+        (r"^(?i:what movies did) %s (?i:(?:star|act|play) in)[?.!]?$", "person", "ACTED_IN"),
+        (r"^(?i:tell me about) %s[?.!]?$", None, None),
+    )
+]
+
+# Shortcut reply clauses per kind of entity and relationship
+_SHORTCUT_CLAUSES = {
+    ("movie", "DIRECTED"): "was directed by %s",
+    ("movie", "ACTED_IN"): "stars %s",
+    ("person", "DIRECTED"): "directed %s",
+    ("person", "ACTED_IN"): "acted in %s",
+}
+
+# Maps LangChain message types to OpenAI chat roles for Batch API requests
+_MESSAGE_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+@lru_cache(maxsize=1)
+def _configure_llm_cache() -> None:
+    """
+    Enable LangChain's LLM response cache as selected by LLM_CACHE.
+
+    LLM_CACHE=memory keeps responses in process; LLM_CACHE=sqlite persists them
+    to LLM_CACHE_PATH (default .langchain.db). Unset disables caching.
+    """
+    backend = os.getenv("LLM_CACHE", "").lower()
+    if backend == "memory":
+        set_llm_cache(InMemoryCache())
+    elif backend == "sqlite":
+        set_llm_cache(SQLiteCache(database_path=os.getenv("LLM_CACHE_PATH", ".langchain.db")))
+    elif backend:
+        raise ValueError(f"Unsupported LLM_CACHE value: '{backend}'")
+
+
+@lru_cache(maxsize=8)
+def _make_llm(model_name: str, temperature: float) -> ChatOpenAI:
+    """Share one client, and its HTTP connection pool, per model configuration."""
+    return ChatOpenAI(model=model_name, temperature=temperature)
+
+
+@lru_cache(maxsize=1)
+def _default_tools() -> Tuple[BaseTool, ...]:
+    """Build the agent tools once; they only hold the shared database."""
+    return (InformationTool(), BatchInformationTool())
+
+
+@lru_cache(maxsize=1)
+def _default_tool_functions() -> Tuple[Dict, ...]:
+    """Convert the agent tools to OpenAI function schemas once."""
+    return tuple(convert_to_openai_function(t) for t in _default_tools())
+
+
+def _match_shortcut(input_text: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Parse a query that matches one of the shortcut patterns.
+
+    Args:
+        input_text: Natural language query
+
+    Returns:
+        Optional[Tuple[str, Optional[str], Optional[str]]]: Name of the movie or
+        person asked about, its expected kind and the relationship asked about
+        (None for any), if the query matches
+    """
+    for pattern, kind, role in _SHORTCUT_PATTERNS:
+        match = pattern.match(input_text.strip())
+        if match:
+            return match.group("entity"), kind, role
+    return None
+
+
+def _join_names(names: List[str]) -> str:
+    """Join names into an English list such as "A, B and C"."""
+    if len(names) < 2:
+        return "".join(names)
+    return "%s and %s" % (", ".join(names[:-1]), names[-1])
+
+
+def _format_shortcut(record: Dict, kind: Optional[str], role: Optional[str]) -> Optional[str]:
+    """
+    Answer a shortcut query from an entity record.
+
+    Args:
+        record: Entity record as returned by GraphDatabase.get_entity
+        kind: Kind of entity the query asks about, or None for any
+        role: Relationship the query asks about, or None for all of them
+
+    Returns:
+        Optional[str]: Reply sentence, or None if the record does not answer
+        the query and it should go through the agent instead
+    """
+    if kind is not None and record["kind"] != kind:
+        return None
+
+    if record["kind"] == "movie":
+        item_key = "name"
+        year = getattr(record["date"], "year", record["date"])
+        subject = "%s (%s)" % (record["name"], year) if year else record["name"]
+    else:
+        item_key = "title"
+        subject = record["name"]
+
+    clauses = []
+    for (clause_kind, clause_role), clause in _SHORTCUT_CLAUSES.items():
+        if clause_kind != record["kind"] or role not in (None, clause_role):
+            continue
+        names = [i[item_key] for i in record["items"] if i[item_key] and i["role"] == clause_role]
+        if names:
+            clauses.append(clause % _join_names(names))
+
+    if not clauses:
+        return None
+    return "%s %s." % (subject, " and ".join(clauses))
+
+
+class _TokenQueueHandler(BaseCallbackHandler):
+    """Callback handler that forwards streamed LLM tokens to a queue."""
+
+    def __init__(self) -> None:
+        self.tokens: "queue.Queue[Optional[str]]" = queue.Queue()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        # Function-call turns stream empty content tokens; only text is forwarded
+        if token:
+            self.tokens.put(token)
 
-from graphsemantics.tools import InformationTool
 
 class SemanticAgent:
     """Agent that provides a semantic layer over the graph database."""
 
-    def __init__(self, model_name: str = "gpt-3.5-turbo", temperature: float = 0):
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", SYSTEM_PROMPT),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("user", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+
+    batch_prompt = ChatPromptTemplate.from_messages([
+        ("system", BATCH_SYSTEM_PROMPT),
+        ("user", "{input}"),
+    ])
+
+    def __init__(
+        self,
+        model_name: str = "gpt-3.5-turbo",
+        temperature: float = 0,
+        concurrency: int = 8,
+        shortcuts: bool = True,
+        verbose: bool = True,
+        warm_cache: bool = True,
+    ):
         """
         Initialize the semantic agent.
 
         Args:
             model_name: Name of the OpenAI model to use
             temperature: Temperature parameter for the model
+            concurrency: Maximum number of queries abatch runs at the same time
+            shortcuts: Answer simple lookups such as "Who played in Casino?"
+                directly from the database, skipping the LLM
+            verbose: Print the agent's intermediate steps to stdout
+            warm_cache: Prefetch popular entities in the background; disable
+                for one-shot queries that would not benefit from it
         """
         if not os.getenv("OPENAI_API_KEY"):
             raise EnvironmentError(
                 "OPENAI_API_KEY environment variable is required but not set."
             )
-        self.llm = ChatOpenAI(model=model_name, temperature=temperature)
-        self.tools = [InformationTool()]
-        self.llm_with_tools = self.llm.bind(
-            functions=[convert_to_openai_function(t) for t in self.tools]
+        self.model_name = model_name
+        self.temperature = temperature
+        self.concurrency = concurrency
+        self.shortcuts = shortcuts
+        _configure_llm_cache()
+        self.llm = _make_llm(model_name, temperature)
+        self.tools = list(_default_tools())
+        if warm_cache:
+            # Connect to Neo4j and warm the entity cache while the LLM is set up
+            threading.Thread(target=self._warm_up, daemon=True).start()
+        self.llm_with_tools = self.llm.bind(functions=list(_default_tool_functions()))
+
+        # Set up the agent. Only stream() streams: streamed responses carry no
+        # token usage, which would hide the cost of every other query
+        self.agent = self._make_agent(self.llm_with_tools)
+        self.agent_executor = AgentExecutor(
+            agent=self.agent,
+            tools=self.tools,
+            verbose=verbose,
+            stream_runnable=False
+        )
+        self.stream_executor = AgentExecutor(
+            agent=self._make_agent(self.llm_with_tools.bind(stream=True)),
+            tools=self.tools,
+            verbose=verbose
         )
 
-        # Define the prompt template
-        self.prompt = ChatPromptTemplate.from_messages([
-            (
-                "system",
-                "You are a helpful assistant that finds information about movies "
-                "and recommends them. If tools require follow up questions, "
-                "make sure to ask the user for clarification. Make sure to include any "
-                "available options that need to be clarified in the follow up questions "
-                "Do only the things the user specifically requested. "
-            ),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("user", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
-
-        # Set up the agent
-        self.agent = (
+    def _make_agent(self, llm_with_tools: Runnable) -> Runnable:
+        """Chain the prompt, the given tool-calling model and the output parser."""
+        return (
             {
                 "input": lambda x: x["input"],
                 "chat_history": lambda x: self._format_chat_history(x["chat_history"])
@@ -61,15 +259,39 @@ class SemanticAgent:
                 ),
             }
             | self.prompt
-            | self.llm_with_tools
+            | llm_with_tools
             | OpenAIFunctionsAgentOutputParser()
         )
 
-        self.agent_executor = AgentExecutor(
-            agent=self.agent,
-            tools=self.tools,
-            verbose=True
-        )
+    def _warm_up(self) -> None:
+        """Establish the database connection and prefetch popular entities."""
+        try:
+            self.tools[0].db.warm_cache()
+        except Exception:
+            # Connection errors resurface on the first tool call
+            pass
+
+    def _try_shortcut(self, input_text: str) -> Optional[str]:
+        """
+        Answer a simple lookup directly from the database.
+
+        Args:
+            input_text: Natural language query
+
+        Returns:
+            Optional[str]: Answer to the query, or None if the query is not a
+            simple lookup or the database has no answer to it
+        """
+        if not self.shortcuts:
+            return None
+        match = _match_shortcut(input_text)
+        if match is None:
+            return None
+        entity, kind, role = match
+        record = self.tools[0].db.get_entity(entity)
+        if record is None:
+            return None
+        return _format_shortcut(record, kind, role)
 
     def _format_chat_history(self, chat_history: List[Tuple[str, str]]):
         """
@@ -98,8 +320,209 @@ class SemanticAgent:
         Returns:
             str: Response from the agent
         """
+        shortcut = self._try_shortcut(input_text)
+        if shortcut is not None:
+            return shortcut
+
         result = self.agent_executor.invoke({
             "input": input_text,
             "chat_history": chat_history or []
         })
         return result["output"]
+
+    def stream(
+        self, input_text: str, chat_history: List[Tuple[str, str]] = None
+    ) -> Iterator[str]:
+        """
+        Query the semantic layer and yield the response as it is generated.
+
+        Tool calls still run to completion first, but the answer is yielded
+        token by token instead of after the whole response is produced.
+
+        Args:
+            input_text: Natural language query
+            chat_history: Optional chat history for context
+
+        Yields:
+            str: Chunks of the response from the agent
+        """
+        shortcut = self._try_shortcut(input_text)
+        if shortcut is not None:
+            yield shortcut
+            return
+
+        handler = _TokenQueueHandler()
+        outcome: Dict[str, Any] = {}
+
+        def run() -> None:
+            try:
+                outcome["result"] = self.stream_executor.invoke(
+                    {"input": input_text, "chat_history": chat_history or []},
+                    config={"callbacks": [handler]},
+                )
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                handler.tokens.put(None)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+
+        streamed = False
+        while True:
+            token = handler.tokens.get()
+            if token is None:
+                break
+            streamed = True
+            yield token
+        thread.join()
+
+        if "error" in outcome:
+            raise outcome["error"]
+        # Cached LLM responses are returned whole without token callbacks
+        if not streamed:
+            yield outcome["result"]["output"]
+
+    async def aquery(
+        self, input_text: str, chat_history: List[Tuple[str, str]] = None
+    ) -> str:
+        """
+        Query the semantic layer with natural language without blocking.
+
+        Args:
+            input_text: Natural language query
+            chat_history: Optional chat history for context
+
+        Returns:
+            str: Response from the agent
+        """
+        shortcut = await asyncio.to_thread(self._try_shortcut, input_text)
+        if shortcut is not None:
+            return shortcut
+
+        result = await self.agent_executor.ainvoke({
+            "input": input_text,
+            "chat_history": chat_history or []
+        })
+        return result["output"]
+
+    async def abatch(self, input_texts: List[str]) -> List[str]:
+        """
+        Run several independent queries concurrently.
+
+        At most ``concurrency`` queries are in flight at once to stay within
+        OpenAI rate limits.
+
+        Args:
+            input_texts: Natural language queries
+
+        Returns:
+            List[str]: Responses from the agent, in the order of the queries
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(input_text: str) -> str:
+            async with semaphore:
+                return await self.aquery(input_text)
+
+        return await asyncio.gather(*(run(text) for text in input_texts))
+
+    def submit_batch(
+        self,
+        input_texts: List[str],
+        entities: Optional[List[List[str]]] = None,
+    ) -> str:
+        """
+        Submit queries to the OpenAI Batch API for offline processing.
+
+        Batch requests are cheaper than the interactive path but may take up to
+        24 hours and cannot call tools. The entities of each query are
+        therefore resolved up front with a single database call and inlined
+        into the prompt as context.
+
+        Args:
+            input_texts: Natural language queries
+            entities: Movie/person names to pre-resolve for each query; by
+                default the entity of queries that match a shortcut pattern
+
+        Returns:
+            str: ID of the submitted batch job, to be passed to poll_batch
+
+        Raises:
+            ValueError: If entities is given but does not match input_texts in length
+        """
+        if entities is None:
+            matches = [_match_shortcut(input_text) for input_text in input_texts]
+            entities = [[match[0]] if match else [] for match in matches]
+        elif len(entities) != len(input_texts):
+            raise ValueError("entities must contain one list per input text")
+
+        context = {}
+        names = list(dict.fromkeys(e for names in entities for e in names))
+        if names:
+            context = self.tools[0].db.get_information_many(names)
+
+        lines = []
+        for i, input_text in enumerate(input_texts):
+            info = [context[e] for e in entities[i] if e in context]
+            if info:
+                input_text = f"{input_text}\n\nContext:\n" + "\n\n".join(info)
+            messages = self.batch_prompt.format_messages(input=input_text)
+            lines.append(json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model_name,
+                    "temperature": self.temperature,
+                    "messages": [
+                        {"role": _MESSAGE_ROLES[m.type], "content": m.content}
+                        for m in messages
+                    ],
+                },
+            }))
+
+        client = OpenAI()
+        batch_file = client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def poll_batch(self, job_id: str) -> Optional[List[Optional[str]]]:
+        """
+        Fetch the results of a job submitted with submit_batch.
+
+        Args:
+            job_id: ID returned by submit_batch
+
+        Returns:
+            Optional[List[Optional[str]]]: None while the job is still running,
+            otherwise one response per submitted query (None for failed requests)
+
+        Raises:
+            Exception: If the batch job failed, expired or was cancelled
+        """
+        client = OpenAI()
+        batch = client.batches.retrieve(job_id)
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise Exception(f"Batch job {job_id} did not complete: {batch.status}")
+        if batch.status != "completed":
+            return None
+
+        outputs = {}
+        if batch.output_file_id:
+            content = client.files.content(batch.output_file_id).text
+            for line in content.splitlines():
+                item = json.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") == 200:
+                    body = response["body"]
+                    outputs[int(item["custom_id"])] = body["choices"][0]["message"]["content"]
+
+        return [outputs.get(i) for i in range(batch.request_counts.total)]
@@ -6,7 +6,7 @@ import os
 from typing import Optional
 from dotenv import load_dotenv
 
-from graphsemantics.database import GraphDatabase
+from graphsemantics.database import get_default_graph_database
 from graphsemantics.agent import SemanticAgent
 
 def setup_environment(env_file: Optional[str] = None):
@@ -60,6 +60,11 @@ def main():
         default=0,
         help="Temperature for the model (default: 0)"
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print the response as it is generated"
+    )
 
     args = parser.parse_args()
 
@@ -67,25 +72,38 @@ def main():
     setup_environment(args.env_file)
 
     # Initialize database
-    db = GraphDatabase()
+    db = get_default_graph_database()
+    try:
+        # Import data if requested
+        if args.import_data:
+            print("Importing sample movie data...")
+            db.import_movie_data()
+            print("Data import complete!")
+            if not args.query:
+                return
 
-    # Import data if requested
-    if args.import_data:
-        print("Importing sample movie data...")
-        db.import_movie_data()
-        print("Data import complete!")
-        if not args.query:
-            return
-
-    # Handle query if provided
-    if args.query:
-        agent = SemanticAgent(
-            model_name=args.model,
-            temperature=args.temperature
-        )
-        print(f"\nQuery: {args.query}")
-        response = agent.query(args.query)
-        print(f"Response: {response}")
+        # Handle query if provided
+        if args.query:
+            # Step logs would interleave with the streamed tokens on stdout.
+            # A single query gains nothing from warming the cache, and the
+            # warm-up thread could reopen the driver after db.close()
+            agent = SemanticAgent(
+                model_name=args.model,
+                temperature=args.temperature,
+                verbose=not args.stream,
+                warm_cache=False
+            )
+            print(f"\nQuery: {args.query}")
+            if args.stream:
+                print("Response: ", end="", flush=True)
+                for chunk in agent.stream(args.query):
+                    print(chunk, end="", flush=True)
+                print()
+            else:
+                response = agent.query(args.query)
+                print(f"Response: {response}")
+    finally:
+        db.close()
 
 if __name__ == "__main__":
     main()
@@ -14,45 +14,239 @@ Example:
 
 Attributes:
     MOVIE_IMPORT_QUERY (str): Cypher query template for importing movie data
-    MOVIE_INFO_QUERY (str): Cypher query template for retrieving movie information
-    PERSON_INFO_QUERY (str): Cypher query template for retrieving person information
+    INDEX_QUERIES (tuple): Cypher statements creating the constraints and indexes
+        used by the import and lookups
+    COMBINED_INFO_QUERY (str): Cypher query template for retrieving movie or person
+        information in a single round-trip
+    BATCH_INFO_QUERY (str): Cypher query template for retrieving information about
+        several candidates in a single round-trip
+    TOP_ENTITIES_QUERY (str): Cypher query template for finding the most connected
+        movies and people
+    CACHE_MAXSIZE (int): Default number of entries kept in the information cache
+    MAX_TOOL_OBS_ITEMS (int): Maximum number of people/movies listed per entity
+    ROLE_PRIORITY (tuple): Relationship types listed first when truncating
+    DEFAULT_MAX_TOOL_OBS_TOKENS (int): Token budget of a formatted entity description,
+        overridable with the MAX_TOOL_OBS_TOKENS environment variable
 """
 import os
-from typing import Dict, List, Optional, Union
-from langchain_community.graphs import Neo4jGraph
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+import neo4j
+import tiktoken
 
 # Query templates for database operations
 MOVIE_IMPORT_QUERY = """
 LOAD CSV WITH HEADERS FROM 'https://raw.githubusercontent.com/tomasonjo/blog-datasets/main/movies/movies_small.csv' AS row
-MERGE (m:Movie {id:row.movieId})
-SET m.released = date(row.released),
-    m.title = row.title,
-    m.imdbRating = toFloat(row.imdbRating)
-FOREACH (director in split(row.director, '|') |
-    MERGE (p:Person {name:trim(director)})
-    MERGE (p)-[:DIRECTED]->(m))
-FOREACH (actor in split(row.actors, '|') |
-    MERGE (p:Person {name:trim(actor)})
-    MERGE (p)-[:ACTED_IN]->(m))
-FOREACH (genre in split(row.genres, '|') |
-    MERGE (g:Genre {name:trim(genre)})
-    MERGE (m)-[:IN_GENRE]->(g))
+CALL {
+    WITH row
+    MERGE (m:Movie {id:row.movieId})
+    SET m.released = date(row.released),
+        m.title = row.title,
+        m.imdbRating = toFloat(row.imdbRating)
+    FOREACH (director in split(row.director, '|') |
+        MERGE (p:Person {name:trim(director)})
+        MERGE (p)-[:DIRECTED]->(m))
+    FOREACH (actor in split(row.actors, '|') |
+        MERGE (p:Person {name:trim(actor)})
+        MERGE (p)-[:ACTED_IN]->(m))
+    FOREACH (genre in split(row.genres, '|') |
+        MERGE (g:Genre {name:trim(genre)})
+        MERGE (m)-[:IN_GENRE]->(g))
+} IN TRANSACTIONS OF 500 ROWS
 """
 
-MOVIE_INFO_QUERY = """
-MATCH (m:Movie {title: $candidate})
-OPTIONAL MATCH (p:Person)-[r]->(m)
-RETURN m.title as title, m.released as released,
-       collect(DISTINCT {name: p.name, role: type(r)}) as people
+# Plain indexes on Person.name, such as the person_name index of older setups,
+# block the uniqueness constraint below and are superseded by its own index
+CONFLICTING_INDEXES_QUERY = """
+SHOW RANGE INDEXES
+YIELD name, labelsOrTypes, properties, owningConstraint
+WHERE owningConstraint IS NULL
+  AND labelsOrTypes = ['Person'] AND properties = ['name']
+RETURN name
 """
 
-PERSON_INFO_QUERY = """
-MATCH (p:Person {name: $candidate})
-OPTIONAL MATCH (p)-[r]->(m:Movie)
-RETURN p.name as name, p.born as born,
-       collect(DISTINCT {title: m.title, role: type(r)}) as movies
+INDEX_QUERIES = (
+    "CREATE CONSTRAINT movie_id_unique IF NOT EXISTS "
+    "FOR (m:Movie) REQUIRE m.id IS UNIQUE",
+    "CREATE CONSTRAINT person_name_unique IF NOT EXISTS "
+    "FOR (p:Person) REQUIRE p.name IS UNIQUE",
+    "CREATE CONSTRAINT genre_name_unique IF NOT EXISTS "
+    "FOR (g:Genre) REQUIRE g.name IS UNIQUE",
+    "CREATE INDEX movie_title IF NOT EXISTS FOR (m:Movie) ON (m.title)",
+    "CREATE FULLTEXT INDEX entityNames IF NOT EXISTS "
+    "FOR (n:Movie|Person) ON EACH [n.title, n.name]",
+)
+
+# Matches the movie or person named by `candidate`; shared by the lookup queries
+_ENTITY_INFO_SUBQUERY = """
+CALL {
+    WITH candidate
+    MATCH (m:Movie {title: candidate})
+    OPTIONAL MATCH (p:Person)-[r]->(m)
+    RETURN 'movie' as kind, m.title as name, m.released as date,
+           collect(DISTINCT {name: p.name, role: type(r)}) as items
+    UNION
+    WITH candidate
+    MATCH (p:Person {name: candidate})
+    OPTIONAL MATCH (p)-[r]->(m:Movie)
+    RETURN 'person' as kind, p.name as name, p.born as date,
+           collect(DISTINCT {title: m.title, role: type(r)}) as items
+}
+"""
+
+COMBINED_INFO_QUERY = (
+    "WITH $candidate AS candidate"
+    + _ENTITY_INFO_SUBQUERY
+    + "RETURN kind, name, date, items\nORDER BY kind\nLIMIT 1\n"
+)
+
+BATCH_INFO_QUERY = (
+    "UNWIND $candidates AS candidate"
+    + _ENTITY_INFO_SUBQUERY
+    + "RETURN candidate, kind, name, date, items\n"
+)
+
+TOP_ENTITIES_QUERY = """
+CALL {
+    MATCH (m:Movie)
+    RETURN m.title as name, size([(m)<--() | 1]) as degree
+    ORDER BY degree DESC
+    LIMIT $top_k
+    UNION
+    MATCH (p:Person)
+    RETURN p.name as name, size([(p)-->() | 1]) as degree
+    ORDER BY degree DESC
+    LIMIT $top_k
+}
+RETURN name
 """
 
+CACHE_MAXSIZE = 1024
+
+# Limits on the entity descriptions that are fed back to the LLM as tool output
+MAX_TOOL_OBS_ITEMS = 10
+ROLE_PRIORITY = ("DIRECTED", "ACTED_IN")
+DEFAULT_MAX_TOOL_OBS_TOKENS = 200
+
+# Entity description templates, formatted with a single % operation
+_MOVIE_FMT = "Movie: %s%s\nPeople involved:\n- %s"
+_PERSON_FMT = "Person: %s%s\nFilmography:\n- %s"
+_ITEM_FMT = "%s (%s)"
+_MORE_FMT = "\n- ... (+%d more)"
+
+# Rough English average, used to budget tokens when the tokenizer is unavailable
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Optional[tiktoken.Encoding]:
+    """
+    Load the tokenizer used to enforce MAX_TOOL_OBS_TOKENS.
+
+    tiktoken downloads the encoding on first use. Failures are cached as None
+    so that a missing tokenizer never breaks or slows down entity lookups.
+    """
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def _summarize_for_prompt(
+    items: Iterable[Dict],
+    max_items: int = MAX_TOOL_OBS_ITEMS,
+    priority: Sequence[str] = ROLE_PRIORITY,
+) -> Tuple[List[Dict], int]:
+    """
+    Keep the most relevant people/movies of an entity for the LLM prompt.
+
+    Args:
+        items: People or movies with a role key
+        max_items: Maximum number of items to keep
+        priority: Roles ordered from most to least relevant
+
+    Returns:
+        Tuple[List[Dict], int]: The kept items and the number of dropped items
+    """
+    ranked = sorted(
+        items,
+        key=lambda item: (
+            priority.index(item["role"]) if item["role"] in priority else len(priority)
+        ),
+    )
+    return ranked[:max_items], max(len(ranked) - max_items, 0)
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text down to at most max_tokens tokens.
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+
+    Returns:
+        str: The text, truncated with a trailing ellipsis if it was over budget
+    """
+    # A token is never shorter than one byte, so short texts skip the tokenizer
+    if len(text.encode("utf-8")) <= max_tokens:
+        return text
+    encoding = _encoding()
+    if encoding is None:
+        max_chars = max_tokens * _CHARS_PER_TOKEN
+        return text if len(text) <= max_chars else text[:max_chars] + "..."
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]) + "..."
+
+
+def _fetch_all(tx: neo4j.ManagedTransaction, query: str, params: Dict) -> List[Dict]:
+    return [record.data() for record in tx.run(query, params)]
+
+
+def _format_information(record: Dict) -> str:
+    """
+    Format a COMBINED_INFO_QUERY record into a human-readable description.
+
+    Args:
+        record: Row with kind, name, date and items columns
+
+    Returns:
+        str: Description of the movie or person, bounded by MAX_TOOL_OBS_TOKENS
+    """
+    max_tokens = int(os.getenv("MAX_TOOL_OBS_TOKENS", DEFAULT_MAX_TOOL_OBS_TOKENS))
+
+    if record["kind"] == "movie":
+        # OPTIONAL MATCH yields a single null entry for movies without people
+        items, more = _summarize_for_prompt(p for p in record["items"] if p["name"])
+        body = "\n- ".join(_ITEM_FMT % (p["name"], p["role"]) for p in items)
+        if more:
+            body += _MORE_FMT % more
+
+        year = getattr(record["date"], "year", record["date"])
+        year_info = " (%s)" % year if year else ""
+        return _truncate_tokens(_MOVIE_FMT % (record["name"], year_info, body), max_tokens)
+
+    items, more = _summarize_for_prompt(m for m in record["items"] if m["title"])
+    body = "\n- ".join(_ITEM_FMT % (m["title"], m["role"]) for m in items)
+    if more:
+        body += _MORE_FMT % more
+
+    birth_info = " (born %s)" % record["date"] if record["date"] else ""
+    return _truncate_tokens(_PERSON_FMT % (record["name"], birth_info, body), max_tokens)
+
+
+class CacheInfo(NamedTuple):
+    """Hit/miss statistics of the information cache."""
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
 class GraphDatabase:
     """
     A class to manage Neo4j graph database connections and operations.
@@ -60,21 +254,29 @@ class GraphDatabase:
     This class provides methods for connecting to a Neo4j database, importing
     sample movie data, and retrieving information about movies and people.
 
+    The underlying driver pools its connections, so instances should be
+    closed (or used as a context manager) once they are no longer needed.
+
     Attributes:
-        graph (Neo4jGraph): The Neo4j graph connection instance
+        driver (neo4j.Driver): The Neo4j driver instance, opened on first use
 
     Raises:
         EnvironmentError: If required environment variables are not set
         ConnectionError: If unable to connect to the Neo4j database
     """
 
-    def __init__(self) -> None:
+    def __init__(self, cache_maxsize: int = CACHE_MAXSIZE) -> None:
         """
-        Initialize the graph database connection using environment variables.
+        Initialize the graph database configuration using environment variables.
+
+        The connection itself is opened on first access to ``driver``, so
+        constructing a GraphDatabase does not wait for Neo4j.
+
+        Args:
+            cache_maxsize: Maximum number of entities kept in the information cache
 
         Raises:
             EnvironmentError: If required environment variables are not set
-            ConnectionError: If unable to connect to the Neo4j database
         """
         required_vars = ['NEO4J_URI', 'NEO4J_USERNAME', 'NEO4J_PASSWORD']
         missing_vars = [var for var in required_vars if not os.getenv(var)]
@@ -84,63 +286,316 @@ class GraphDatabase:
                 f"Missing required environment variables: {', '.join(missing_vars)}"
             )
 
+        self._database = os.getenv("NEO4J_DATABASE", "neo4j")
+        self._driver: Optional[neo4j.Driver] = None
+        self._driver_lock = threading.Lock()
+
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._cache_maxsize = cache_maxsize
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_lock = threading.Lock()
+        # Bumped on invalidation, so lookups that started earlier are not cached
+        self._cache_generation = 0
+        self._warmed_generation: Optional[int] = None
+        self._warm_lock = threading.Lock()
+
+    def __enter__(self) -> "GraphDatabase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def driver(self) -> neo4j.Driver:
+        """
+        The Neo4j driver, connected on first access.
+
+        Raises:
+            ConnectionError: If unable to connect to the Neo4j database
+        """
+        if self._driver is None:
+            with self._driver_lock:
+                if self._driver is None:
+                    self._driver = self._connect("Failed to connect to Neo4j")
+        return self._driver
+
+    def _connect(self, error_message: str) -> neo4j.Driver:
         try:
-            self.graph = Neo4jGraph(
-                url=os.getenv("NEO4J_URI"),
-                username=os.getenv("NEO4J_USERNAME"),
-                password=os.getenv("NEO4J_PASSWORD")
+            driver = neo4j.GraphDatabase.driver(
+                os.getenv("NEO4J_URI"),
+                auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
             )
+            driver.verify_connectivity()
+            return driver
+        except Exception as e:
+            raise ConnectionError(f"{error_message}: {str(e)}")
+
+    def query(self, query: str, params: Optional[Dict] = None) -> List[Dict]:
+        """
+        Run a read query in a managed read transaction.
+
+        The session borrows a pooled connection from the driver, and the
+        transaction is retried automatically on transient errors.
+
+        Args:
+            query: Cypher query to run
+            params: Query parameters
+
+        Returns:
+            List[Dict]: The result records
+        """
+        with self.driver.session(database=self._database) as session:
+            return session.execute_read(_fetch_all, query, params or {})
+
+    def execute(self, query: str, params: Optional[Dict] = None) -> None:
+        """
+        Run a write or schema statement in an auto-commit transaction.
+
+        Auto-commit is required by statements that manage their own
+        transactions, such as ``CALL { ... } IN TRANSACTIONS``.
+
+        Args:
+            query: Cypher statement to run
+            params: Statement parameters
+        """
+        with self.driver.session(database=self._database) as session:
+            session.run(query, params or {}).consume()
+
+    def close(self) -> None:
+        """Close the driver and its connection pool."""
+        with self._driver_lock:
+            if self._driver is not None:
+                self._driver.close()
+                self._driver = None
+
+    def ensure_indexes(self) -> None:
+        """
+        Create the constraints and indexes backing imports and lookups.
+
+        Uniqueness constraints turn the MERGEs of the import into index probes,
+        and exact title/name matches become index seeks instead of label scans.
+        The statements are idempotent, so calling this repeatedly is safe.
+        Reads do not depend on them, so read-only users can skip this.
+        """
+        try:
+            for record in self.query(CONFLICTING_INDEXES_QUERY):
+                self.execute("DROP INDEX `%s` IF EXISTS" % record["name"].replace("`", "``"))
+            for query in INDEX_QUERIES:
+                self.execute(query)
         except Exception as e:
-            raise ConnectionError(f"Failed to connect to Neo4j: {str(e)}")
+            raise Exception(f"Failed to create indexes: {str(e)}")
 
     def import_movie_data(self) -> None:
+        # The constraints must exist before the MERGEs of the import can use them
+        self.ensure_indexes()
         try:
-            self.graph.query(MOVIE_IMPORT_QUERY)
+            self.execute(MOVIE_IMPORT_QUERY)
         except Exception as e:
             raise Exception(f"Failed to import movie data: {str(e)}")
+        self.invalidate_cache()
 
-    def get_information(self, candidate: str) -> str:
-        movie_result = self.graph.query(
-            MOVIE_INFO_QUERY,
-            {"candidate": candidate}
-        )
+    def get_information(self, candidate: str, strict: bool = False) -> str:
+        """
+        Retrieve information about a movie or person, using the in-process cache.
+
+        Movie and person data is effectively static between imports, so repeated
+        lookups of the same entity are served without a round-trip to Neo4j.
 
-        if movie_result and movie_result[0]["title"]:
-            movie = movie_result[0]
-            people_info = []
-            for person in movie["people"]:
-                people_info.append(f"{person['name']} ({person['role']})")
+        Args:
+            candidate: Title of the movie or name of the person
+            strict: Raise instead of returning a not-found message
 
-            return (
-                f"Movie: {movie['title']} ({movie['released'].year})\n"
-                f"People involved:\n- " + "\n- ".join(people_info)
+        Returns:
+            str: Formatted information about the entity, or a not-found message
+            that the agent can pass to the LLM as a regular tool result
+
+        Raises:
+            ValueError: If strict is set and no movie or person matches the candidate
+        """
+        key = candidate.strip()
+        record = self.get_entity(key)
+        if record is None:
+            if strict:
+                raise ValueError(f"No information found for '{key}'")
+            return f"No information found for '{key}'"
+        return _format_information(record)
+
+    def get_entity(self, candidate: str) -> Optional[Dict]:
+        """
+        Retrieve the raw record of a movie or person, using the in-process cache.
+
+        Unlike get_information, the people or movies of the record are neither
+        summarized nor truncated.
+
+        Args:
+            candidate: Title of the movie or name of the person
+
+        Returns:
+            Optional[Dict]: Record with kind, name, date and items columns, or
+            None if no movie or person matches the candidate
+        """
+        key = candidate.strip()
+        record = self._cache_get(key)
+        if record is None:
+            generation = self._cache_generation
+            record = self._get_entity_uncached(key)
+            if record is not None:
+                self._cache_put(key, record, generation)
+        return record
+
+    def get_information_many(self, candidates: List[str]) -> Dict[str, str]:
+        """
+        Retrieve information about several movies or people at once.
+
+        Cache misses are resolved together with one UNWIND query, so N
+        entities cost a single round-trip to Neo4j instead of N.
+
+        Args:
+            candidates: Titles of movies and/or names of people
+
+        Returns:
+            Dict[str, str]: Formatted information keyed by candidate; candidates
+            without a matching movie or person are omitted
+        """
+        found: Dict[str, Dict] = {}
+        missing: List[str] = []
+        for candidate in candidates:
+            key = candidate.strip()
+            record = self._cache_get(key)
+            if record is not None:
+                found[key] = record
+            elif key not in missing:
+                missing.append(key)
+
+        if missing:
+            found.update(self._fetch_entities(missing))
+
+        return {
+            candidate: _format_information(found[candidate.strip()])
+            for candidate in candidates
+            if candidate.strip() in found
+        }
+
+    def warm_cache(self, top_k: int = 200) -> None:
+        """
+        Prefetch the most connected movies and people into the information cache.
+
+        These are the entities most likely to be asked about, so warming them
+        up front means the first queries are served without a Neo4j round-trip.
+        The cache is warmed once; later calls return immediately until the
+        cache is invalidated.
+
+        Args:
+            top_k: Number of movies and of people to prefetch
+        """
+        with self._warm_lock:
+            generation = self._cache_generation
+            if self._warmed_generation == generation:
+                return
+            # Load the tokenizer now rather than on the first long description
+            _encoding()
+            result = self.query(TOP_ENTITIES_QUERY, {"top_k": top_k})
+            self._fetch_entities(
+                [record["name"] for record in result if record["name"]], generation
             )
+            self._warmed_generation = generation
 
-        person_result = self.graph.query(
-            PERSON_INFO_QUERY,
-            {"candidate": candidate}
-        )
+    def invalidate_cache(self) -> None:
+        """Drop all cached entity information."""
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_generation += 1
+
+    def _fetch_entities(
+        self, keys: List[str], generation: Optional[int] = None
+    ) -> Dict[str, Dict]:
+        """
+        Look up several entities with one query and cache their records.
+
+        Args:
+            keys: Stripped titles of movies and/or names of people
+            generation: Cache generation the lookup started in, if earlier than now
+
+        Returns:
+            Dict[str, Dict]: Records keyed by candidate; candidates without a
+            matching movie or person are omitted, and movies win over people
+        """
+        if not keys:
+            return {}
+        if generation is None:
+            generation = self._cache_generation
+        records: Dict[str, Dict] = {}
+        for record in self.query(BATCH_INFO_QUERY, {"candidates": keys}):
+            key = record.pop("candidate")
+            if record["name"] and (key not in records or record["kind"] == "movie"):
+                records[key] = record
+        for key, record in records.items():
+            self._cache_put(key, record, generation)
+        return records
+
+    def _cache_get(self, key: str) -> Optional[Dict]:
+        with self._cache_lock:
+            if key not in self._cache:
+                self._cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self._cache_hits += 1
+            return self._cache[key]
 
-        if person_result and person_result[0]["name"]:
-            person = person_result[0]
-            movies_info = []
-            for movie in person["movies"]:
-                movies_info.append(f"{movie['title']} ({movie['role']})")
+    def _cache_put(self, key: str, record: Dict, generation: int) -> None:
+        with self._cache_lock:
+            if generation != self._cache_generation:
+                # Fetched before an invalidation, so possibly stale
+                return
+            self._cache[key] = record
+            self._cache.move_to_end(key)
+            if len(self._cache) > self._cache_maxsize:
+                self._cache.popitem(last=False)
 
-            birth_info = f" (born {person['born']})" if person["born"] else ""
-            return (
-                f"Person: {person['name']}{birth_info}\n"
-                f"Filmography:\n- " + "\n- ".join(movies_info)
+    def cache_info(self) -> CacheInfo:
+        """
+        Report cache statistics for tuning the cache size.
+
+        Returns:
+            CacheInfo: Hits, misses, maximum size and current size of the cache
+        """
+        with self._cache_lock:
+            return CacheInfo(
+                self._cache_hits,
+                self._cache_misses,
+                self._cache_maxsize,
+                len(self._cache),
             )
 
-        raise ValueError(f"No information found for '{candidate}'")
+    def _get_entity_uncached(self, candidate: str) -> Optional[Dict]:
+        result = self.query(
+            COMBINED_INFO_QUERY,
+            {"candidate": candidate}
+        )
+
+        if result and result[0]["name"]:
+            return result[0]
+        return None
 
     def refresh_connection(self) -> None:
-        try:
-            self.graph = Neo4jGraph(
-                url=os.getenv("NEO4J_URI"),
-                username=os.getenv("NEO4J_USERNAME"),
-                password=os.getenv("NEO4J_PASSWORD")
-            )
-        except Exception as e:
-            raise ConnectionError(f"Failed to refresh Neo4j connection: {str(e)}")
+        driver = self._connect("Failed to refresh Neo4j connection")
+        with self._driver_lock:
+            previous, self._driver = self._driver, driver
+        if previous is not None:
+            previous.close()
+        self.invalidate_cache()
+
+
+@lru_cache(maxsize=1)
+def get_default_graph_database() -> GraphDatabase:
+    """
+    Return the process-wide GraphDatabase shared by tools and agents.
+
+    A GraphDatabase's first query opens a Neo4j connection pool, so tools
+    and agents share one instance instead of each opening their own.
+
+    Returns:
+        GraphDatabase: The shared database instance
+    """
+    return GraphDatabase()
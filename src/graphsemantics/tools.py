@@ -1,27 +1,38 @@
 """
 Custom tools implementation for the semantic layer.
 """
-from typing import Optional
+from typing import List, Optional
 from langchain_core.callbacks import CallbackManagerForToolRun
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
-from graphsemantics.database import GraphDatabase
+from graphsemantics.database import GraphDatabase, get_default_graph_database
 
 class MovieEntityInput(BaseModel):
     """Input model for the Information tool."""
     entity: str = Field(description="The name of the movie or person to search for")
 
+class MovieEntitiesInput(BaseModel):
+    """Input model for the BatchInformation tool."""
+    entities: List[str] = Field(
+        description="The names of the movies or people to search for"
+    )
+
 class InformationTool(BaseTool):
     """Tool for retrieving information about movies and people from the graph database."""
     name = "Information"
-    description = "Use this tool to get information about movies or people in the movie database"
+    description = "Get info about a movie or person."
     args_schema = MovieEntityInput
+    db: Optional[GraphDatabase] = None
+
+    def __init__(self, db: Optional[GraphDatabase] = None):
+        """
+        Initialize the tool with a database connection.
 
-    def __init__(self):
-        """Initialize the tool with a database connection."""
-        super().__init__()
-        self.db = GraphDatabase()
+        Args:
+            db: Database to query; defaults to the shared GraphDatabase instance
+        """
+        super().__init__(db=db or get_default_graph_database())
 
     def _run(
         self,
@@ -39,3 +50,47 @@ class InformationTool(BaseTool):
             str: Information about the requested entity
         """
         return self.db.get_information(entity)
+
+    def _run_batch(
+        self,
+        entities: List[str],
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> str:
+        """
+        Retrieve information about several movies or people in one database call.
+
+        Args:
+            entities: Names of the movies or people to search for
+            run_manager: Callback manager for the tool run
+
+        Returns:
+            str: Information about each requested entity
+        """
+        found = self.db.get_information_many(entities)
+        return "\n\n".join(
+            found.get(entity, f"No information found for '{entity}'")
+            for entity in entities
+        )
+
+class BatchInformationTool(InformationTool):
+    """Tool for retrieving information about several movies or people at once."""
+    name = "BatchInformation"
+    description = "Get info about several movies or people at once."
+    args_schema = MovieEntitiesInput
+
+    def _run(
+        self,
+        entities: List[str],
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> str:
+        """
+        Execute the tool to retrieve information about several movies or people.
+
+        Args:
+            entities: Names of the movies or people to search for
+            run_manager: Callback manager for the tool run
+
+        Returns:
+            str: Information about each requested entity
+        """
+        return self._run_batch(entities, run_manager=run_manager)
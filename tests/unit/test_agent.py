@@ -0,0 +1,340 @@
+"""
+Unit tests for the agent module.
+
+These tests verify the prompt configuration, query shortcuts and query entry
+points of the SemanticAgent class.
+"""
+import asyncio
+import json
+import pytest
+import tiktoken
+from unittest.mock import MagicMock, patch
+from langchain_community.cache import InMemoryCache, SQLiteCache
+from graphsemantics.agent import (
+    BATCH_SYSTEM_PROMPT,
+    SYSTEM_PROMPT,
+    SemanticAgent,
+    _configure_llm_cache,
+    _make_llm,
+    _match_shortcut,
+)
+from graphsemantics.database import GraphDatabase
+from graphsemantics.tools import BatchInformationTool, InformationTool
+
+
+@pytest.fixture
+def mock_db():
+    """Create a mock database instance."""
+    return MagicMock(spec=GraphDatabase)
+
+
+@pytest.fixture
+def agent(mock_db, monkeypatch):
+    """Create an agent whose tools use the mock database."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    tools = (InformationTool(db=mock_db), BatchInformationTool(db=mock_db))
+    with patch("graphsemantics.agent._default_tools", return_value=tools), \
+            patch("graphsemantics.agent._default_tool_functions", return_value=()):
+        return SemanticAgent(concurrency=2)
+
+
+@pytest.fixture
+def mock_openai():
+    """Create a mock OpenAI client."""
+    with patch("graphsemantics.agent.OpenAI") as mock:
+        yield mock.return_value
+
+
+@pytest.fixture
+def llm_cache():
+    """Reset the configured LLM cache around a test."""
+    _configure_llm_cache.cache_clear()
+    with patch("graphsemantics.agent.set_llm_cache") as mock:
+        yield mock
+    _configure_llm_cache.cache_clear()
+
+
+def test_llm_cache_memory(llm_cache, monkeypatch):
+    """Test LLM_CACHE=memory keeps responses in process."""
+    monkeypatch.setenv("LLM_CACHE", "memory")
+    _configure_llm_cache()
+    assert isinstance(llm_cache.call_args.args[0], InMemoryCache)
+
+
+def test_llm_cache_sqlite(llm_cache, monkeypatch, tmp_path):
+    """Test LLM_CACHE=sqlite persists responses to LLM_CACHE_PATH."""
+    path = tmp_path / "cache.db"
+    monkeypatch.setenv("LLM_CACHE", "SQLite")
+    monkeypatch.setenv("LLM_CACHE_PATH", str(path))
+    _configure_llm_cache()
+    assert isinstance(llm_cache.call_args.args[0], SQLiteCache)
+    assert path.exists()
+
+
+def test_llm_cache_unsupported(llm_cache, monkeypatch):
+    """Test unknown LLM_CACHE values are rejected."""
+    monkeypatch.setenv("LLM_CACHE", "redis")
+    with pytest.raises(ValueError) as exc_info:
+        _configure_llm_cache()
+    assert "redis" in str(exc_info.value)
+    llm_cache.assert_not_called()
+
+
+def test_llm_cache_disabled(llm_cache, monkeypatch):
+    """Test caching stays off when LLM_CACHE is unset."""
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    _configure_llm_cache()
+    llm_cache.assert_not_called()
+
+
+def test_make_llm_shared_per_configuration(monkeypatch):
+    """Test one client is shared per model and temperature."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    _make_llm.cache_clear()
+    assert _make_llm("gpt-3.5-turbo", 0) is _make_llm("gpt-3.5-turbo", 0)
+    assert _make_llm("gpt-3.5-turbo", 0) is not _make_llm("gpt-3.5-turbo", 0.5)
+    assert _make_llm("gpt-3.5-turbo", 0) is not _make_llm("gpt-4", 0)
+    _make_llm.cache_clear()
+
+
+def test_system_prompt_token_budget():
+    """Test the system prompt stays small, since every LLM call pays for it."""
+    try:
+        encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+    except Exception as e:
+        # The encoding is downloaded on first use and cached afterwards
+        pytest.skip(f"tiktoken encoding unavailable: {e}")
+    assert len(encoding.encode(SYSTEM_PROMPT)) < 40
+
+
+@pytest.mark.parametrize("query,expected", [
+    ("Who played in Casino?", ("Casino", "movie", "ACTED_IN")),
+    ("who directed The Matrix", ("The Matrix", "movie", "DIRECTED")),
+    ("What movies did Christopher Nolan direct?", ("Christopher Nolan", "person", "DIRECTED")),
+    ("What movies did Tom Hanks star in?", ("Tom Hanks", "person", "ACTED_IN")),
+    ("Tell me about 'Inception'.", ("Inception", None, None)),
+    ("Tell me about The Lord of the Rings", ("The Lord of the Rings", None, None)),
+    ("Tell me about the best movies of 1995", None),
+    ("Tell me about Christopher Nolan's movies", None),
+    ("Which actors appeared in both Inception and The Dark Knight?", None),
+])
+def test_match_shortcut(query, expected):
+    """Test simple lookups are recognised and other queries are not."""
+    assert _match_shortcut(query) == expected
+
+
+CASINO = {
+    "kind": "movie",
+    "name": "Casino",
+    "date": 1995,
+    "items": [
+        {"name": "Martin Scorsese", "role": "DIRECTED"},
+        {"name": "Robert De Niro", "role": "ACTED_IN"},
+        {"name": "Sharon Stone", "role": "ACTED_IN"},
+        {"name": "Joe Pesci", "role": "ACTED_IN"},
+    ],
+}
+
+
+@pytest.mark.parametrize("query,reply", [
+    ("Who played in Casino?", "Casino (1995) stars Robert De Niro, Sharon Stone and Joe Pesci."),
+    ("Who directed Casino?", "Casino (1995) was directed by Martin Scorsese."),
+    (
+        "Tell me about Casino",
+        "Casino (1995) was directed by Martin Scorsese and stars Robert De Niro, "
+        "Sharon Stone and Joe Pesci.",
+    ),
+])
+def test_shortcut_reply(agent, mock_db, query, reply):
+    """Test shortcuts answer the question asked, listing every matching person."""
+    mock_db.get_entity.return_value = CASINO
+    agent.agent_executor = MagicMock()
+    assert agent.query(query) == reply
+    mock_db.get_entity.assert_called_once_with("Casino")
+    agent.agent_executor.invoke.assert_not_called()
+
+
+@pytest.mark.parametrize("query,record", [
+    # A person asked about as if they were a movie
+    ("Who played in Martin Scorsese?", {
+        "kind": "person", "name": "Martin Scorsese", "date": 1942,
+        "items": [{"title": "Casino", "role": "DIRECTED"}],
+    }),
+    # A movie without any directors in the graph
+    ("Who directed Casino?", dict(CASINO, items=CASINO["items"][1:])),
+    ("Who played in Casino?", None),
+])
+def test_shortcut_falls_back_to_agent(agent, mock_db, query, record):
+    """Test queries the database cannot answer directly go through the agent."""
+    mock_db.get_entity.return_value = record
+    agent.agent_executor = MagicMock()
+    agent.agent_executor.invoke.return_value = {"output": "From the agent"}
+    assert agent.query(query) == "From the agent"
+
+
+def test_warm_cache_disabled(mock_db, monkeypatch):
+    """Test one-shot agents leave the database cache alone."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    tools = (InformationTool(db=mock_db), BatchInformationTool(db=mock_db))
+    with patch("graphsemantics.agent._default_tools", return_value=tools), \
+            patch("graphsemantics.agent._default_tool_functions", return_value=()), \
+            patch("graphsemantics.agent.threading.Thread") as mock_thread:
+        SemanticAgent(warm_cache=False)
+    mock_thread.assert_not_called()
+    mock_db.warm_cache.assert_not_called()
+
+
+def test_abatch_order_and_concurrency(agent):
+    """Test abatch keeps input order and caps the number of in-flight queries."""
+    in_flight = 0
+    peak = 0
+
+    async def ainvoke(inputs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Earlier queries take longer, so completion order differs from input order
+        await asyncio.sleep(0.01 * (5 - int(inputs["input"][-1])))
+        in_flight -= 1
+        return {"output": inputs["input"].upper()}
+
+    agent.agent_executor = MagicMock()
+    agent.agent_executor.ainvoke = ainvoke
+
+    result = asyncio.run(agent.abatch([f"query {i}" for i in range(5)]))
+    assert result == [f"QUERY {i}" for i in range(5)]
+    assert peak == 2
+
+
+def test_submit_batch(agent, mock_db, mock_openai):
+    """Test batch requests render the batch prompt with inlined context."""
+    mock_db.get_information_many.return_value = {"Casino": "Movie: Casino (1995)"}
+    mock_openai.batches.create.return_value.id = "batch_1"
+
+    job_id = agent.submit_batch(
+        ["Who played in Casino?", "Recommend a movie"],
+        entities=[["Casino"], []],
+    )
+    assert job_id == "batch_1"
+    mock_db.get_information_many.assert_called_once_with(["Casino"])
+
+    upload = mock_openai.files.create.call_args.kwargs
+    assert upload["purpose"] == "batch"
+    lines = [json.loads(line) for line in upload["file"][1].decode().splitlines()]
+    assert [line["custom_id"] for line in lines] == ["0", "1"]
+    for line in lines:
+        messages = line["body"]["messages"]
+        assert [m["role"] for m in messages] == ["system", "user"]
+        assert messages[0]["content"] == BATCH_SYSTEM_PROMPT
+    assert lines[0]["body"]["messages"][1]["content"] == (
+        "Who played in Casino?\n\nContext:\nMovie: Casino (1995)"
+    )
+    assert lines[1]["body"]["messages"][1]["content"] == "Recommend a movie"
+
+
+def test_submit_batch_derives_entities(agent, mock_db, mock_openai):
+    """Test entities are taken from shortcut-style queries when not given."""
+    mock_db.get_information_many.return_value = {"Casino": "Movie: Casino (1995)"}
+
+    agent.submit_batch(["Who played in Casino?", "Recommend a movie"])
+    mock_db.get_information_many.assert_called_once_with(["Casino"])
+
+    upload = mock_openai.files.create.call_args.kwargs
+    lines = [json.loads(line) for line in upload["file"][1].decode().splitlines()]
+    assert lines[0]["body"]["messages"][1]["content"] == (
+        "Who played in Casino?\n\nContext:\nMovie: Casino (1995)"
+    )
+    assert lines[1]["body"]["messages"][1]["content"] == "Recommend a movie"
+
+
+def test_submit_batch_entities_length_mismatch(agent, mock_openai):
+    """Test entities must provide one list per input."""
+    with pytest.raises(ValueError):
+        agent.submit_batch(["Who played in Casino?"], entities=[])
+    mock_openai.files.create.assert_not_called()
+
+
+def test_poll_batch_in_progress(agent, mock_openai):
+    """Test polling returns None until the job has completed."""
+    mock_openai.batches.retrieve.return_value.status = "in_progress"
+
+    assert agent.poll_batch("batch_1") is None
+    mock_openai.files.content.assert_not_called()
+
+
+def test_poll_batch_failed(agent, mock_openai):
+    """Test polling raises when the job did not complete."""
+    mock_openai.batches.retrieve.return_value.status = "expired"
+
+    with pytest.raises(Exception) as exc_info:
+        agent.poll_batch("batch_1")
+    assert "expired" in str(exc_info.value)
+
+
+def test_poll_batch_completed(agent, mock_openai):
+    """Test results are matched to inputs by custom_id; failed requests map to None."""
+    batch = mock_openai.batches.retrieve.return_value
+    batch.status = "completed"
+    batch.output_file_id = "file_out"
+    batch.request_counts.total = 3
+    mock_openai.files.content.return_value.text = "\n".join([
+        json.dumps({
+            "custom_id": "2",
+            "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"content": "third"}}]}
+            }
+        }),
+        json.dumps({
+            "custom_id": "1",
+            "response": {"status_code": 500, "body": {}}
+        }),
+        json.dumps({
+            "custom_id": "0",
+            "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"content": "first"}}]}
+            }
+        }),
+    ])
+
+    assert agent.poll_batch("batch_1") == ["first", None, "third"]
+
+
+def test_only_stream_path_streams(agent):
+    """Test query keeps token usage by not streaming, while stream does stream."""
+    assert not agent.llm.streaming
+    assert not agent.agent_executor.agent.stream_runnable
+    assert agent.stream_executor.agent.stream_runnable
+
+
+def test_stream_tokens(agent):
+    """Test streamed tokens are yielded as they arrive, skipping empty ones."""
+    def invoke(inputs, config):
+        handler = config["callbacks"][0]
+        for token in ["", "Robert", " De Niro", ""]:
+            handler.on_llm_new_token(token)
+        return {"output": "Robert De Niro"}
+
+    agent.stream_executor = MagicMock()
+    agent.stream_executor.invoke.side_effect = invoke
+
+    assert list(agent.stream("Who starred with Sharon Stone?")) == ["Robert", " De Niro"]
+
+
+def test_stream_without_tokens(agent):
+    """Test the whole output is yielded when no tokens are streamed, e.g. cache hits."""
+    agent.stream_executor = MagicMock()
+    agent.stream_executor.invoke.return_value = {"output": "Robert De Niro"}
+
+    assert list(agent.stream("Who starred with Sharon Stone?")) == ["Robert De Niro"]
+
+
+def test_stream_reraises_errors(agent):
+    """Test errors raised by the agent are re-raised to the caller."""
+    agent.stream_executor = MagicMock()
+    agent.stream_executor.invoke.side_effect = RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError) as exc_info:
+        list(agent.stream("Who starred with Sharon Stone?"))
+    assert "rate limited" in str(exc_info.value)
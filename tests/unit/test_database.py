@@ -7,13 +7,21 @@ and its methods for managing Neo4j connections and queries.
 import os
 import pytest
 from unittest.mock import MagicMock, patch
-from graphsemantics.database import GraphDatabase
+from graphsemantics.database import (
+    CONFLICTING_INDEXES_QUERY,
+    INDEX_QUERIES,
+    MOVIE_IMPORT_QUERY,
+    GraphDatabase,
+    _encoding,
+    _summarize_for_prompt,
+    get_default_graph_database,
+)
 
 
 @pytest.fixture
 def mock_neo4j():
-    """Create a mock Neo4j graph instance."""
-    with patch('graphsemantics.database.Neo4jGraph') as mock:
+    """Create a mock Neo4j driver factory."""
+    with patch('graphsemantics.database.neo4j.GraphDatabase.driver') as mock:
         yield mock
 
 
@@ -40,7 +48,7 @@ def test_init_missing_env_vars():
 
 
 def test_init_connection_error(mock_neo4j):
-    """Test initialization fails when Neo4j connection fails."""
+    """Test first use fails when Neo4j connection fails."""
     os.environ.update({
         'NEO4J_URI': 'bolt://localhost:7687',
         'NEO4J_USERNAME': 'neo4j',
@@ -48,8 +56,9 @@ def test_init_connection_error(mock_neo4j):
     })
     mock_neo4j.side_effect = Exception("Connection failed")
 
+    db = GraphDatabase()
     with pytest.raises(ConnectionError) as exc_info:
-        GraphDatabase()
+        db.driver
     assert "Failed to connect to Neo4j" in str(exc_info.value)
 
 
@@ -61,31 +70,71 @@ def test_init_successful(mock_neo4j):
         'NEO4J_PASSWORD': 'password'
     })
     db = GraphDatabase()
+    mock_neo4j.assert_not_called()
+
+    assert db.driver is db.driver
     mock_neo4j.assert_called_once_with(
-        url=os.getenv('NEO4J_URI'),
-        username=os.getenv('NEO4J_USERNAME'),
-        password=os.getenv('NEO4J_PASSWORD')
+        os.getenv('NEO4J_URI'),
+        auth=(os.getenv('NEO4J_USERNAME'), os.getenv('NEO4J_PASSWORD'))
     )
 
 
 def test_import_movie_data(mock_db):
     """Test movie data import functionality."""
-    mock_db.graph.query = MagicMock()
+    mock_db.query = MagicMock(return_value=[])
+    mock_db.execute = MagicMock()
     mock_db.import_movie_data()
-    mock_db.graph.query.assert_called_once()
+    queries = [call.args[0] for call in mock_db.execute.call_args_list]
+    # Constraints are created first so the MERGEs of the import use them
+    assert queries == list(INDEX_QUERIES) + [MOVIE_IMPORT_QUERY]
+
+
+def test_ensure_indexes(mock_db):
+    """Test every lookup index is created."""
+    mock_db.query = MagicMock(return_value=[])
+    mock_db.execute = MagicMock()
+    mock_db.ensure_indexes()
+    assert mock_db.execute.call_count == len(INDEX_QUERIES)
+    for query in INDEX_QUERIES:
+        mock_db.execute.assert_any_call(query)
+
+
+def test_ensure_indexes_drops_conflicting_index(mock_db):
+    """Test a plain Person.name index is dropped before its constraint is created."""
+    mock_db.query = MagicMock(return_value=[{"name": "person_name"}])
+    mock_db.execute = MagicMock()
+    mock_db.ensure_indexes()
+    mock_db.query.assert_called_once_with(CONFLICTING_INDEXES_QUERY)
+    queries = [call.args[0] for call in mock_db.execute.call_args_list]
+    assert queries == ["DROP INDEX `person_name` IF EXISTS"] + list(INDEX_QUERIES)
+
+
+def test_reads_do_not_need_schema_privileges(mock_db, mock_neo4j):
+    """Test connecting runs no schema statements, so read-only users can read."""
+    session = mock_neo4j.return_value.session.return_value.__enter__.return_value
+    session.run.side_effect = Exception("Permission denied")
+    session.execute_read.return_value = [{"name": "Casino"}]
+
+    with pytest.raises(Exception) as exc_info:
+        mock_db.ensure_indexes()
+    assert "Failed to create indexes" in str(exc_info.value)
+
+    assert mock_db.query("RETURN 1") == [{"name": "Casino"}]
+    mock_neo4j.return_value.close.assert_not_called()
 
 
 def test_get_information_movie_found(mock_db):
     """Test retrieving movie information when movie exists."""
     mock_movie_data = {
-        "title": "The Matrix",
-        "released": 1999,
-        "people": [
+        "kind": "movie",
+        "name": "The Matrix",
+        "date": 1999,
+        "items": [
             {"name": "Keanu Reeves", "role": "ACTED_IN"},
             {"name": "Lana Wachowski", "role": "DIRECTED"}
         ]
     }
-    mock_db.graph.query = MagicMock(return_value=[mock_movie_data])
+    mock_db.query = MagicMock(return_value=[mock_movie_data])
 
     result = mock_db.get_information("The Matrix")
     assert "The Matrix (1999)" in result
@@ -96,16 +145,18 @@ def test_get_information_movie_found(mock_db):
 def test_get_information_person_found(mock_db):
     """Test retrieving person information when person exists."""
     mock_person_data = {
+        "kind": "person",
         "name": "Keanu Reeves",
-        "born": 1964,
-        "movies": [
+        "date": 1964,
+        "items": [
             {"title": "The Matrix", "role": "ACTED_IN"},
             {"title": "John Wick", "role": "ACTED_IN"}
         ]
     }
-    mock_db.graph.query = MagicMock(side_effect=[[], [mock_person_data]])
+    mock_db.query = MagicMock(return_value=[mock_person_data])
 
     result = mock_db.get_information("Keanu Reeves")
+    mock_db.query.assert_called_once()
     assert "Keanu Reeves (born 1964)" in result
     assert "The Matrix" in result
     assert "John Wick" in result
@@ -113,8 +164,246 @@ def test_get_information_person_found(mock_db):
 
 def test_get_information_not_found(mock_db):
     """Test retrieving information for non-existent entity."""
-    mock_db.graph.query = MagicMock(return_value=[{"title": None, "name": None}])
+    mock_db.query = MagicMock(return_value=[{"title": None, "name": None}])
+
+    assert "No information found" in mock_db.get_information("NonExistent")
+
+
+def test_get_information_not_found_strict(mock_db):
+    """Test strict lookups raise for non-existent entities."""
+    mock_db.query = MagicMock(return_value=[])
 
     with pytest.raises(ValueError) as exc_info:
-        mock_db.get_information("NonExistent")
+        mock_db.get_information("NonExistent", strict=True)
     assert "No information found" in str(exc_info.value)
+
+
+def test_get_information_cached(mock_db):
+    """Test repeated lookups are served from the cache."""
+    mock_person_data = {
+        "kind": "person",
+        "name": "Keanu Reeves",
+        "date": 1964,
+        "items": [{"title": "The Matrix", "role": "ACTED_IN"}]
+    }
+    mock_db.query = MagicMock(return_value=[mock_person_data])
+
+    first = mock_db.get_information("Keanu Reeves")
+    second = mock_db.get_information(" Keanu Reeves ")
+    assert first == second
+    mock_db.query.assert_called_once()
+
+    info = mock_db.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.currsize == 1
+
+
+def test_import_movie_data_invalidates_cache(mock_db):
+    """Test importing data drops cached entity information."""
+    mock_db._cache["The Matrix"] = "stale"
+    mock_db.query = MagicMock(return_value=[])
+    mock_db.execute = MagicMock()
+    mock_db.import_movie_data()
+    assert mock_db.cache_info().currsize == 0
+
+
+def test_get_information_many(mock_db):
+    """Test several entities are resolved with a single query."""
+    mock_db.query = MagicMock(return_value=[
+        {
+            "candidate": "Keanu Reeves",
+            "kind": "person",
+            "name": "Keanu Reeves",
+            "date": None,
+            "items": [{"title": "The Matrix", "role": "ACTED_IN"}]
+        },
+        {
+            "candidate": "Casino",
+            "kind": "movie",
+            "name": "Casino",
+            "date": 1995,
+            "items": [{"name": "Martin Scorsese", "role": "DIRECTED"}]
+        }
+    ])
+
+    result = mock_db.get_information_many(["Casino", "Keanu Reeves", "NonExistent"])
+    mock_db.query.assert_called_once()
+    assert set(result) == {"Casino", "Keanu Reeves"}
+    assert "Casino (1995)" in result["Casino"]
+    assert "Person: Keanu Reeves" in result["Keanu Reeves"]
+
+    mock_db.query.reset_mock()
+    assert mock_db.get_information("Casino") == result["Casino"]
+    mock_db.query.assert_not_called()
+
+
+def test_get_default_graph_database_shared(mock_neo4j):
+    """Test the default database is created once and shared."""
+    os.environ.update({
+        'NEO4J_URI': 'bolt://localhost:7687',
+        'NEO4J_USERNAME': 'neo4j',
+        'NEO4J_PASSWORD': 'password'
+    })
+    get_default_graph_database.cache_clear()
+    try:
+        assert get_default_graph_database() is get_default_graph_database()
+        get_default_graph_database().driver
+        mock_neo4j.assert_called_once()
+    finally:
+        get_default_graph_database.cache_clear()
+
+
+def test_summarize_for_prompt():
+    """Test directors are kept first and the rest is truncated."""
+    items = [{"name": f"Actor {i}", "role": "ACTED_IN"} for i in range(12)]
+    items.append({"name": "Director", "role": "DIRECTED"})
+
+    kept, more = _summarize_for_prompt(items, max_items=10)
+    assert len(kept) == 10
+    assert more == 3
+    assert kept[0]["name"] == "Director"
+
+
+def test_get_information_large_cast_truncated(mock_db, monkeypatch):
+    """Test long casts are summarized before being returned."""
+    monkeypatch.setenv("MAX_TOOL_OBS_TOKENS", "1000")
+    mock_movie_data = {
+        "kind": "movie",
+        "name": "Casino",
+        "date": 1995,
+        "items": [{"name": f"Actor {i}", "role": "ACTED_IN"} for i in range(25)]
+    }
+    mock_db.query = MagicMock(return_value=[mock_movie_data])
+
+    result = mock_db.get_information("Casino")
+    assert "Actor 9 (ACTED_IN)" in result
+    assert "Actor 10 (ACTED_IN)" not in result
+    assert "... (+15 more)" in result
+
+
+def test_get_entity_shares_cache(mock_db):
+    """Test raw records are kept whole and shared with get_information."""
+    mock_movie_data = {
+        "kind": "movie",
+        "name": "Casino",
+        "date": 1995,
+        "items": [{"name": f"Actor {i}", "role": "ACTED_IN"} for i in range(25)]
+    }
+    mock_db.query = MagicMock(return_value=[mock_movie_data])
+
+    assert mock_db.get_entity(" Casino ") == mock_movie_data
+    assert "Movie: Casino (1995)" in mock_db.get_information("Casino")
+    assert mock_db.query.call_count == 1
+
+
+def test_get_information_movie_without_people(mock_db):
+    """Test the null entry from OPTIONAL MATCH is not listed."""
+    mock_movie_data = {
+        "kind": "movie",
+        "name": "Casino",
+        "date": None,
+        "items": [{"name": None, "role": None}]
+    }
+    mock_db.query = MagicMock(return_value=[mock_movie_data])
+
+    result = mock_db.get_information("Casino")
+    assert result.startswith("Movie: Casino\n")
+    assert "None" not in result
+
+
+def test_warm_cache(mock_db):
+    """Test the most connected entities are prefetched with one lookup query."""
+    mock_db.query = MagicMock(side_effect=[
+        [{"name": "Casino"}, {"name": None}],
+        [{
+            "candidate": "Casino",
+            "kind": "movie",
+            "name": "Casino",
+            "date": 1995,
+            "items": [{"name": "Martin Scorsese", "role": "DIRECTED"}]
+        }]
+    ])
+
+    mock_db.warm_cache(top_k=10)
+    assert mock_db.query.call_count == 2
+    assert mock_db.cache_info().currsize == 1
+    assert "Casino (1995)" in mock_db.get_information("Casino")
+
+
+def test_warm_cache_runs_once(mock_db):
+    """Test repeated warm-ups reuse the warmed cache until it is invalidated."""
+    mock_db.query = MagicMock(return_value=[])
+
+    mock_db.warm_cache()
+    mock_db.warm_cache()
+    assert mock_db.query.call_count == 1
+
+    mock_db.invalidate_cache()
+    mock_db.warm_cache()
+    assert mock_db.query.call_count == 2
+
+
+def test_warm_cache_discards_results_after_invalidation(mock_db):
+    """Test a warm-up overlapping an invalidation caches nothing and reruns."""
+    record = {
+        "candidate": "Casino",
+        "kind": "movie",
+        "name": "Casino",
+        "date": 1995,
+        "items": []
+    }
+
+    def query(query, params=None):
+        if "UNWIND" in query:
+            # Data is re-imported while the warm-up is running
+            mock_db.invalidate_cache()
+            return [dict(record)]
+        return [{"name": "Casino"}]
+
+    mock_db.query = MagicMock(side_effect=query)
+    mock_db.warm_cache()
+    assert mock_db.cache_info().currsize == 0
+
+    mock_db.query = MagicMock(side_effect=[[{"name": "Casino"}], [dict(record)]])
+    mock_db.warm_cache()
+    assert mock_db.query.call_count == 2
+    assert mock_db.cache_info().currsize == 1
+
+
+def test_query_uses_read_transaction(mock_db, mock_neo4j):
+    """Test read queries run in a managed read transaction."""
+    session = mock_neo4j.return_value.session.return_value.__enter__.return_value
+    session.execute_read.return_value = [{"name": "Casino"}]
+
+    assert mock_db.query("RETURN 1") == [{"name": "Casino"}]
+    session.execute_read.assert_called_once()
+
+
+def test_close(mock_db, mock_neo4j):
+    """Test closing the database closes the driver."""
+    with mock_db as db:
+        db.driver
+    mock_neo4j.return_value.close.assert_called_once()
+
+
+def test_get_information_without_tokenizer(mock_db, monkeypatch):
+    """Test descriptions fall back to a character budget without the tokenizer."""
+    monkeypatch.setenv("MAX_TOOL_OBS_TOKENS", "20")
+    mock_movie_data = {
+        "kind": "movie",
+        "name": "Casino",
+        "date": 1995,
+        "items": [{"name": f"Actor {i}", "role": "ACTED_IN"} for i in range(11)]
+    }
+    mock_db.query = MagicMock(return_value=[mock_movie_data])
+
+    _encoding.cache_clear()
+    try:
+        with patch('graphsemantics.database.tiktoken.get_encoding',
+                   side_effect=ConnectionError("offline")):
+            result = mock_db.get_information("Casino")
+    finally:
+        _encoding.cache_clear()
+    assert result.startswith("Movie: Casino (1995)")
+    assert len(result) <= 20 * 4 + len("...")
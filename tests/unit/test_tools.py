@@ -0,0 +1,44 @@
+"""
+Unit tests for the tools module.
+
+These tests verify the Information tools exposed to the agent.
+"""
+import pytest
+from unittest.mock import MagicMock
+from graphsemantics.database import GraphDatabase
+from graphsemantics.tools import BatchInformationTool, InformationTool
+
+
+@pytest.fixture
+def mock_db():
+    """Create a mock database instance."""
+    return MagicMock(spec=GraphDatabase)
+
+
+def test_information_tool(mock_db):
+    """Test the tool returns the database information for an entity."""
+    mock_db.get_information.return_value = "Movie: Casino (1995)"
+
+    result = InformationTool(db=mock_db).run("Casino")
+    assert result == "Movie: Casino (1995)"
+    mock_db.get_information.assert_called_once_with("Casino")
+
+
+def test_batch_information_tool(mock_db):
+    """Test batch results keep the requested order and report missing entities."""
+    mock_db.get_information_many.return_value = {
+        "Keanu Reeves": "Person: Keanu Reeves",
+        "Casino": "Movie: Casino (1995)",
+    }
+
+    result = BatchInformationTool(db=mock_db).run(
+        {"entities": ["Casino", "NonExistent", "Keanu Reeves"]}
+    )
+    assert result.split("\n\n") == [
+        "Movie: Casino (1995)",
+        "No information found for 'NonExistent'",
+        "Person: Keanu Reeves",
+    ]
+    mock_db.get_information_many.assert_called_once_with(
+        ["Casino", "NonExistent", "Keanu Reeves"]
+    )